@@ -28,10 +28,19 @@ Input parameters:
     theta: Projected tilt. 90 means that the image of the ring
            in perpendicular to the orbit in the plane of the sky
     ir: Projected inclindation. 90 for an edge-on ring.
+    output: Output file when several parameter sets are given.
 
 Usage:
 
     $ python exorings-basic.py [<par>=<value>;<par>=<value>;...]
+
+Several parameter sets may be given as ranges and/or parameter files
+(JSON lines, CSV or NumPy, see getParameterSets):
+
+    $ python exorings-basic.py fe=1.5:3.0:0.01 ir=0:89:1 sets=planets.csv
+
+In this case the properties of every set are written as a table to
+the output file.
 """
 
 #############################################################
@@ -51,156 +60,51 @@ default=dict(
     tau=1.0,
     theta=30.0,#degrees
     ir=80.0,#degrees
+    #OUTPUT (SEVERAL PARAMETER SETS)
+    output="exorings-basic.dat",
     )
 
 #GET NEW PARAMETER VALUES FROM COMMAND-LINE (IF PROVIDED)
-par=getParameters(default)
+sets=getParameterSets(default)
 
 #############################################################
-# PHYSICAL PROPERTIES
+# SEVERAL PARAMETER SETS
 #############################################################
+if sets.size!=1:
+    inputs=["rhotrue","P","b","p","fi","fe","tau","theta","ir"]
+    outputs=["delta","pobs","T14p","T23p","T14","T23",
+             "aobs","bobs","rhoobs","logPR"]
+    fo=open(sets.overrides.get("output",default["output"]),"w")
+    fo.write("#"+" ".join(inputs+outputs)+"\n")
+    n=0
+    for par in sets:
+        tp=transitProperties(par)
+        #Sets without transit are reported as nan
+        transit=par.b<=tp.bmax
+        columns=[getattr(par,key) for key in inputs]+\
+            [np.where(transit,getattr(tp,key),np.nan) for key in outputs]
+        table=np.column_stack(np.broadcast_arrays(*columns))
+        np.savetxt(fo,table,fmt="%.6e")
+        n+=len(table)
+    fo.close()
+    print "%d parameter sets evaluated. Results in '%s'."%(n,fo.name)
+    exit(0)
+
+par=iter(sets).next()
 
-#==============================
-#ORBITAL PROPERTIES
-#==============================
-#SEMIMAJOR AXIS (a/R*)
-a=(GCONST*(par.rhotrue*1E3)/(3*np.pi)*(par.P*DAY)**2)**(1./3)
-
-#ORBITAL INCLINATION
-cosiorb=par.b/a
-siniorb=(1-cosiorb**2)**0.5
-
-#==============================
-#EXTERNAL RING PROPERTIES
-#==============================
-#Projected semimajor axis
-A=par.fe*par.p
-
-#Projected semiminor axis
-B=A*np.cos(par.ir*DEG)
+#############################################################
+# TRANSIT PROPERTIES
+#############################################################
+tp=transitProperties(par)
 
 #==============================
 #CHECK TRANSIT CONDITION
 #==============================
-#Approximate semiheight of the box containing the ringed-planet
-hp=max(par.p,A*np.sin(par.theta*DEG),B*np.cos(par.theta*DEG))
-
-#Transit condition
-if par.b>1.0-hp:
+if par.b>tp.bmax:
     print "No transit (or a grazing transit) occurrs with this impact parameter, b = %.2f."%par.b
-    print "Maximum impact parameter: bmax ~ %.3f"%(1.0-hp)
+    print "Maximum impact parameter: bmax ~ %.3f"%tp.bmax
     exit(1)
 
-#############################################################
-# BASIC TRANSIT PROPERTIES
-#############################################################
-
-#%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
-#TRANSIT DEPTH
-#%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
-
-#==============================
-#AUXILIAR VARIABLES
-#==============================
-cosir=np.cos(par.ir*DEG)
-sinir=np.sin(par.ir*DEG)
-
-#==============================
-#ABSORTION/SCATTERING FACTOR
-#==============================
-beta=1-np.exp(-par.tau/cosir)
-
-#==============================
-#INTERNAL RING EFFECTIVE RADIUS
-#==============================
-if par.fi*cosir>1:
-    ri2=par.fi**2*cosir-1
-else:
-    yi=np.sqrt(par.fi**2-1)/(par.fi*sinir)
-    ri2=par.fi**2*cosir*2/np.pi*np.arcsin(yi)-\
-        2/np.pi*np.arcsin(yi*par.fi*cosir)
-ri2=beta*ri2
-
-#==============================
-#EXTERNAL RING EFFECTIVE RADIUS
-#==============================
-if par.fe*cosir>1:
-    re2=par.fe**2*cosir-1
-else:
-    ye=np.sqrt(par.fe**2-1)/(par.fe*sinir)
-    re2=par.fe**2*cosir*2/np.pi*np.arcsin(ye)-\
-        2/np.pi*np.arcsin(ye*par.fe*cosir)
-re2=beta*re2
-
-#==============================
-#RINGED-PLANET AREA
-#==============================
-ARp=np.pi*par.p**2+np.pi*(re2-ri2)*par.p**2
-
-#==============================
-#TRANSIT DEPTH (delta=ARp/As)
-#==============================
-delta=ARp/np.pi
-
-#==============================
-#OBSERVED RADIUS (p=Rp,obs/Rp)
-#==============================
-pobs=np.sqrt(delta)
-
-#%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
-#CONTACT POSITIONS
-#%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
-#Contact positions for planetary disk
-xp14=np.sqrt((1+par.p)**2-par.b**2)
-xp1=-xp14;xp4=+xp14
-xp23=np.sqrt((1-par.p)**2-par.b**2)
-xp2=-xp23;xp3=+xp23
-
-#Contact prosition for external ring (approximate solution)
-xR13=1-A**2*(np.sin(par.theta*DEG)-par.b/A)**2*(1-B**2/A)
-xR24=1-A**2*(np.sin(par.theta*DEG)+par.b/A)**2*(1-B**2/A)
-
-xR1=-np.sqrt(xR13)-A*np.cos(par.theta*DEG)
-xR2=-np.sqrt(xR24)+A*np.cos(par.theta*DEG)
-xR3=+np.sqrt(xR13)-A*np.cos(par.theta*DEG)
-xR4=+np.sqrt(xR24)+A*np.cos(par.theta*DEG)
-
-#Determining which contact positions should be used
-x1=min(xp1,xR1)
-x2=max(xp2,xR2)
-
-x3=min(xp3,xR3)
-x4=max(xp4,xR4)
-
-#%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
-#TRANSIT TIMES
-#%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
-#Non-ringed planet
-T14p=(par.P*DAY)*np.arcsin((xp4-xp1)/(a*siniorb))/(2*np.pi)/HOUR
-T23p=(par.P*DAY)*np.arcsin((xp3-xp2)/(a*siniorb))/(2*np.pi)/HOUR
-
-#Ringed planet
-T14=(par.P*DAY)*np.arcsin((x4-x1)/(a*siniorb))/(2*np.pi)/HOUR
-T23=(par.P*DAY)*np.arcsin((x3-x2)/(a*siniorb))/(2*np.pi)/HOUR
-
-#############################################################
-# DERIVED TRANSIT PROPERTIES
-#############################################################
-
-#Observed scaled semimajor axis
-aobs=2*(par.P*DAY/HOUR)/np.pi*delta**0.25/(T14**2-T23**2)**0.5
-
-#Observed impact parameter
-bobs=((T14**2*(1-np.sqrt(delta))-T23**2*(1+np.sqrt(delta)))/\
-          (T14**2-T23**2))**0.5
-
-#Observed stellar density
-rhoobs=(3*np.pi/GCONST)*aobs**3/(par.P*DAY)**2/1E3
-
-#Photo ring effect
-PR=rhoobs/par.rhotrue
-logPR=np.log10(PR)
-
 #############################################################
 # REPORT
 #############################################################
@@ -219,38 +123,38 @@ print "\tExternal Ring Radius: Re/Rp = %.3f Rp."%par.fe
 print "\tNormal opacity: tau = %.3f."%par.tau
 print "\tProjected inclination (90 deg for edge on): ir = %.2f deg."%par.ir
 print "\tProjected tilt: theta = %.2f deg."%par.theta
-print "\tBlocking factor: beta = %e."%beta
+print "\tBlocking factor: beta = %e."%tp.beta
 
 print L,"DERIVED PROPERTIES",R
 
 print "Orbital properties:"
-print "\tSemimajor axis: a/R*= %.4f"%a
-print "\tOrbital Inclination: iorb = %.3f deg"%(np.arccos(cosiorb)*RAD)
+print "\tSemimajor axis: a/R*= %.4f"%tp.a
+print "\tOrbital Inclination: iorb = %.3f deg"%(np.arccos(tp.cosiorb)*RAD)
 
 print "Ring derived properties:"
-print "\tProjected exrenal ring axes: A/R* = %.4f, B/R* = %.4f"%(A,B)
-print "\tEffective ring interior radius: r_i/R* = %e"%np.sqrt(ri2)
-print "\tEffective ring exterior radius: r_e/R* = %e"%np.sqrt(re2)
-print "\tProjected ring Area: A_Rp/R*^2 = %e"%ARp
+print "\tProjected exrenal ring axes: A/R* = %.4f, B/R* = %.4f"%(tp.A,tp.B)
+print "\tEffective ring interior radius: r_i/R* = %e"%np.sqrt(tp.ri2)
+print "\tEffective ring exterior radius: r_e/R* = %e"%np.sqrt(tp.re2)
+print "\tProjected ring Area: A_Rp/R*^2 = %e"%tp.ARp
 
 print L,"TRANSIT PROPERTIES",R
-print "Transit Depth: delta = %.2f ppm"%(delta*1E6)
-print "Observed Planetary Radius: pobs = sqrt(delta) = %.6f"%(pobs)
+print "Transit Depth: delta = %.2f ppm"%(tp.delta*1E6)
+print "Observed Planetary Radius: pobs = sqrt(delta) = %.6f"%(tp.pobs)
 print "Scaled planetary radius: p = Rp/R* = %.6f"%(par.p)
-print "Planetary radius ratio: pobs/p = %.2f"%(pobs/par.p)
+print "Planetary radius ratio: pobs/p = %.2f"%(tp.pobs/par.p)
 print "Planet contact positions:"
-print "\tx1 = %.3f, x2 = %.3f"%(xp1,xp2)
-print "\tx3 = %.3f, x4 = %.3f"%(xp3,xp4)
+print "\tx1 = %.3f, x2 = %.3f"%(tp.xp1,tp.xp2)
+print "\tx3 = %.3f, x4 = %.3f"%(tp.xp3,tp.xp4)
 print "Ring contact positions:"
-print "\tx1 = %.3f, x2 = %.3f"%(xR1,xR2)
-print "\tx3 = %.3f, x4 = %.3f"%(xR3,xR4)
+print "\tx1 = %.3f, x2 = %.3f"%(tp.xR1,tp.xR2)
+print "\tx3 = %.3f, x4 = %.3f"%(tp.xR3,tp.xR4)
 print "Final Contact positions:"
-print "\tx1 = %.3f, x2 = %.3f"%(x1,x2)
-print "\tx3 = %.3f, x4 = %.3f"%(x3,x4)
-print "Transit duration (non-ringed): T14 = %.4f h, T23 = %.4f"%(T14p,
-                                                                 T23p)
-print "Transit duration (ringed): T14 = %.4f h, T23 = %.4f"%(T14,T23)
-print "Observed scaled semimajor axis: (a/Rs)_obs = %.2f"%(aobs)
-print "Observed impact parameter: b_obs/R* = %.4f"%(bobs)
-print "Observed stellar density: rho_obs = %.2f g/cm^3"%rhoobs
-print "Photo-ring effect: PR = %.4f, log10(PR) = %.2f"%(PR,logPR)
+print "\tx1 = %.3f, x2 = %.3f"%(tp.x1,tp.x2)
+print "\tx3 = %.3f, x4 = %.3f"%(tp.x3,tp.x4)
+print "Transit duration (non-ringed): T14 = %.4f h, T23 = %.4f"%(tp.T14p,
+                                                                 tp.T23p)
+print "Transit duration (ringed): T14 = %.4f h, T23 = %.4f"%(tp.T14,tp.T23)
+print "Observed scaled semimajor axis: (a/Rs)_obs = %.2f"%(tp.aobs)
+print "Observed impact parameter: b_obs/R* = %.4f"%(tp.bobs)
+print "Observed stellar density: rho_obs = %.2f g/cm^3"%tp.rhoobs
+print "Photo-ring effect: PR = %.4f, log10(PR) = %.2f"%(tp.PR,tp.logPR)
@@ -0,0 +1,140 @@
+from exorings import *
+"""
+This script screens a catalog of transiting candidates comparing, for
+each object, a ringed and a ringless planet model fitted to the
+observed:
+
+    Transit depth: delta
+    Transit durations: T14, T23
+    Stellar density: rho_true
+
+Output columns (one line per candidate):
+
+    id: candidate identifier
+    chi2ringless: chi^2 of the best ringless fit
+    pringless: goodness-of-fit probability of the ringless fit
+    chi2ringed: chi^2 of the best ringed fit
+    lnLR: log-likelihood ratio, ringed versus ringless; positive
+          values favor the ringed model
+    rho, p, b, fe, theta, ir: best ringed model parameters
+
+Both models fit rho, p and b.  The ringed model does not fit the ring
+geometry (fe, theta, ir): its likelihood is averaged over a grid of
+geometries (see classifyCandidate).  Candidates that cannot be
+classified (missing or invalid values, failed fits) are reported and
+written with nan values.
+
+Input parameters:
+
+    catalog: candidate catalog.  The commented line before the data
+             gives the column names: id P rhotrue erhotrue delta edelta
+             T14 eT14 T23 eT23 (days, g/cm^3, ppm and hours).
+    output: output file.  Results are appended as they are computed;
+            candidates already present in this file are skipped, so an
+            interrupted run can be resumed.
+    fi: Ring interior radius assumed by the ringed model (smaller
+        than the largest exterior radius in FEGRID).
+    tau: Ring normal opacity assumed by the ringed model.
+    nproc: Number of worker processes (0 to use all processors).
+    chunk: Candidates sent to a worker at once.
+
+Usage:
+
+    $ python exorings-classify.py catalog=candidates.dat nproc=8
+"""
+from functools import partial
+from itertools import islice
+from os.path import isfile
+import multiprocessing as mp
+
+#############################################################
+# INPUT PARAMETERS
+#############################################################
+
+#DEFAULT PARAMETER VALUES
+default=dict(
+    #FILES
+    catalog="candidates.dat",
+    output="candidates-classified.dat",
+    #RINGED MODEL
+    fi=1.5,#Rplanet
+    tau=1.0,
+    #EXECUTION
+    nproc=0,
+    chunk=20,
+    )
+
+#GET NEW PARAMETER VALUES FROM COMMAND-LINE (IF PROVIDED)
+par=getParameters(default)
+
+#The ringed model needs at least one geometry with fe>fi
+if par.fi>=max(FEGRID):
+    print "Ring interior radius fi = %.2f must be smaller than %.2f."%(
+        par.fi,max(FEGRID))
+    exit(1)
+
+#############################################################
+# CLASSIFY
+#############################################################
+COLUMNS=["id","chi2ringless","pringless","chi2ringed","lnLR",
+         "rho","p","b","fe","theta","ir"]
+
+#==============================
+#CANDIDATES ALREADY CLASSIFIED
+#==============================
+done=set()
+if isfile(par.output):
+    #Lines cut by an interrupted run are incomplete and not counted
+    for line in open(par.output):
+        if line[0]=="#" or line.strip()=="":continue
+        if line.endswith("\n") and len(line.split())==len(COLUMNS):
+            done.add(line.split()[0])
+    print "%d candidates already classified in '%s'."%(len(done),
+                                                        par.output)
+    #Drop an incomplete last line so the file ends with a newline
+    fo=open(par.output,"r+")
+    fo.seek(0,2)
+    end=fo.tell()
+    fo.seek(max(0,end-4096))
+    tail=fo.read()
+    if not tail.endswith("\n"):
+        fo.truncate(end-len(tail)+tail.rfind("\n")+1)
+    fo.seek(0,2)
+    if fo.tell()==0:fo.write("#"+" ".join(COLUMNS)+"\n")
+else:
+    fo=open(par.output,"w")
+    fo.write("#"+" ".join(COLUMNS)+"\n")
+
+candidates=(row for row in readCatalog(par.catalog)
+            if row["id"] not in done)
+
+#==============================
+#RUN WORKERS
+#==============================
+nproc=par.nproc if par.nproc>0 else mp.cpu_count()
+pool=mp.Pool(nproc)
+classify=partial(classifyCandidate,fi=par.fi,tau=par.tau)
+
+#The pool is fed a slice of the catalog at a time, so only a few
+#chunks per worker are held in memory
+nslice=4*nproc*par.chunk
+n=0;nfailed=0
+while True:
+    block=list(islice(candidates,nslice))
+    if len(block)==0:break
+    for r in pool.imap_unordered(classify,block,par.chunk):
+        #Failed candidates are written with nan values
+        if r["status"] is not None:
+            print "Candidate '%s' not classified: %s."%(r["id"],r["status"])
+            nfailed+=1
+        fo.write("%s "%r["id"]+
+                 " ".join("%.6e"%r[col] for col in COLUMNS[1:])+"\n")
+        n+=1
+    fo.flush()
+    print "%d candidates classified."%n
+pool.close()
+pool.join()
+fo.close()
+
+print "Done. %d candidates classified (%d failed). Results in '%s'."%(
+    n,nfailed,par.output)
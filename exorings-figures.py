@@ -0,0 +1,211 @@
+from exorings import *
+"""
+This script renders figures from computed result files (e.g. the
+tables written by exorings-basic.py when several parameter sets are
+given):
+
+    posterior: probability density of a column (default logPR) for
+               one or more result files, e.g.
+               figures/posterior-PhotoRing-timing-comparison.png
+    map: photo-ring map, mean of a column (default logPR) binned in
+         two other columns (default theta and ir)
+
+Reductions of the result files (binned histograms and maps) are
+cached in the cache directory keyed on the hash of the file content
+and the reduction options.  A figure is only rendered again when one
+of its reductions or its description changed, so re-rendering after
+a small edit does not read the unchanged result files again.
+
+Input parameters:
+
+    spec: JSON file with the list of figures.  Each figure is a
+          dictionary with:
+
+            output: image file.
+            kind: "posterior" or "map".
+            inputs: list of result files.
+            labels: legend labels (posterior, optional).
+            column: column to reduce (default "logPR").
+            bins: number of bins (posterior, default 50) or [nx,ny]
+                  (map, default [90,90]).
+            limits: histogram limits [min,max] (posterior) or
+                    [[xmin,xmax],[ymin,ymax]] (map).  Column ranges
+                    are used if not provided (for maps, the ranges
+                    spanned by all the inputs).
+            x, y: columns of the map axes (map, default "theta", "ir").
+
+    cache: cache directory.
+    force: 1 to render all figures even if they are up to date.
+
+Usage:
+
+    $ python exorings-figures.py spec=figures.json
+
+Example of figure list:
+
+    [{"output":"figures/posterior-PhotoRing-timing-comparison.png",
+      "kind":"posterior",
+      "inputs":["analytical.dat","numerical.dat"],
+      "labels":["Analytical","Numerical"]},
+     {"output":"figures/map-PhotoRing.png",
+      "kind":"map",
+      "inputs":["exorings-basic.dat"]}]
+"""
+from os.path import isfile,join
+import json,hashlib
+
+try:
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+except ImportError:
+    print "Package '%s' not installed.  To continue please install the linux package '%s'."%("matplotlib","python-matplotlib")
+    exit(1)
+
+#############################################################
+# INPUT PARAMETERS
+#############################################################
+
+#DEFAULT PARAMETER VALUES
+default=dict(
+    spec="figures.json",
+    cache="cache",
+    force=0,
+    )
+
+#GET NEW PARAMETER VALUES FROM COMMAND-LINE (IF PROVIDED)
+par=getParameters(default)
+
+#############################################################
+# PLOTTING ROUTINES
+#############################################################
+LABELS=dict(
+    logPR=r"$\log_{10}(\rho_{\rm obs}/\rho_\star)$",
+    PR=r"$\rho_{\rm obs}/\rho_\star$",
+    theta=r"$\theta$ (deg)",
+    ir=r"$i_r$ (deg)",
+    fe=r"$f_e$",
+    fi=r"$f_i$",
+    b=r"$b$",
+    p=r"$p$",
+    )
+
+def plotPosterior(fig,reductions):
+    """
+    Plot the probability density of a column for every input.
+    """
+    column=fig.get("column","logPR")
+    labels=fig.get("labels",fig["inputs"])
+    plt.figure(figsize=(8,8))
+    ax=plt.gca()
+    for red,label in zip(reductions,labels):
+        edges=red["edges"];counts=red["counts"]
+        centers=(edges[1:]+edges[:-1])/2
+        density=counts/(counts.sum()*np.diff(edges))
+        ax.plot(centers,density,linewidth=2,label=label)
+    ax.set_xlabel(LABELS.get(column,column),fontsize=18)
+    ax.set_ylabel("Probability Density",fontsize=18)
+    ax.set_yticks([])
+    ax.legend(loc="upper right")
+
+    if column=="logPR":
+        ax.axvline(0.0,color="k",linestyle="--",linewidth=2)
+        #Top axis in rho_true/rho_obs
+        tax=ax.twiny()
+        tax.set_xlim(ax.get_xlim())
+        ticks=ax.get_xticks()
+        tax.set_xticks(ticks)
+        tax.set_xticklabels(["%.1f"%10**(-t) for t in ticks])
+        tax.set_xlabel(r"$\rho_\star/\rho_{\rm obs}$",fontsize=18)
+
+def plotMap(fig,reductions):
+    """
+    Plot the binned mean of a column (all inputs combined).
+    """
+    column=fig.get("column","logPR")
+    for red in reductions[1:]:
+        if not (np.array_equal(red["xedges"],reductions[0]["xedges"]) and
+                np.array_equal(red["yedges"],reductions[0]["yedges"])):
+            print "Inputs of '%s' have different map bins."%fig["output"]
+            exit(1)
+    sums=sum(red["sums"] for red in reductions)
+    counts=sum(red["counts"] for red in reductions)
+    with np.errstate(invalid='ignore',divide='ignore'):
+        mean=np.ma.masked_invalid(sums/counts)
+    red=reductions[0]
+    plt.figure(figsize=(8,7))
+    ax=plt.gca()
+    #Center the color scale in the absence of photo-ring effect
+    vmax=np.abs(mean).max() if column=="logPR" else None
+    vmin=-vmax if column=="logPR" else None
+    mesh=ax.pcolormesh(red["xedges"],red["yedges"],mean.T,cmap="RdBu_r",
+                       vmin=vmin,vmax=vmax)
+    cbar=plt.colorbar(mesh)
+    cbar.set_label(LABELS.get(column,column),fontsize=18)
+    ax.set_xlabel(LABELS.get(fig.get("x","theta"),fig.get("x","theta")),
+                  fontsize=18)
+    ax.set_ylabel(LABELS.get(fig.get("y","ir"),fig.get("y","ir")),
+                  fontsize=18)
+    ax.set_xlim(red["xedges"][0],red["xedges"][-1])
+    ax.set_ylim(red["yedges"][0],red["yedges"][-1])
+
+#############################################################
+# RENDER FIGURES
+#############################################################
+figures=json.load(open(par.spec))
+
+#Keys of the figures rendered in previous runs
+manifest=join(par.cache,"figures.json")
+rendered=json.load(open(manifest)) if isfile(manifest) else dict()
+
+for fig in figures:
+    output=fig["output"]
+
+    #==============================
+    #REDUCTIONS
+    #==============================
+    if fig["kind"]=="posterior":
+        reduction=histogramTable
+        options=dict(column=fig.get("column","logPR"),
+                     bins=fig.get("bins",50),
+                     limits=fig.get("limits",None))
+    elif fig["kind"]=="map":
+        reduction=mapTable
+        options=dict(x=fig.get("x","theta"),y=fig.get("y","ir"),
+                     column=fig.get("column","logPR"),
+                     bins=fig.get("bins",[90,90]),
+                     limits=fig.get("limits",None))
+        #Common bins for all the inputs
+        if options["limits"] is None and len(fig["inputs"])>1:
+            limits=np.array([cachedReduction(rangeTable,filename,par.cache,
+                                             columns=[options["x"],
+                                                      options["y"]])
+                             [0]["limits"] for filename in fig["inputs"]])
+            options["limits"]=[[float(limits[:,k,0].min()),
+                                float(limits[:,k,1].max())]
+                               for k in xrange(2)]
+    else:
+        print "Unknown figure kind '%s' for '%s'."%(fig["kind"],output)
+        exit(1)
+
+    reductions=[];keys=[]
+    for filename in fig["inputs"]:
+        red,key=cachedReduction(reduction,filename,par.cache,**options)
+        reductions+=[red];keys+=[key]
+
+    #==============================
+    #RENDER ONLY IF SOMETHING CHANGED
+    #==============================
+    figkey=hashlib.sha1(json.dumps([fig,keys],sort_keys=True)).hexdigest()
+    if not par.force and isfile(output) and rendered.get(output)==figkey:
+        print "Figure '%s' is up to date."%output
+        continue
+
+    if fig["kind"]=="posterior":plotPosterior(fig,reductions)
+    else:plotMap(fig,reductions)
+    plt.savefig(output,bbox_inches="tight")
+    plt.close()
+
+    rendered[output]=figkey
+    json.dump(rendered,open(manifest,"w"),indent=1)
+    print "Figure '%s' rendered."%output
@@ -16,6 +16,8 @@ from sys import exit,argv
 ############################################################
 packages={
     "numpy":dict(linux="python-numpy",alias="np"),
+    "scipy.optimize":dict(linux="python-scipy",alias="opt"),
+    "scipy.stats":dict(linux="python-scipy",alias="stats"),
     }
 
 for pack in packages.keys():
@@ -54,39 +56,767 @@ class dict2obj(object):
         for attr in other.__dict__.keys():exec("self.%s=other.%s"%(attr,attr))
         return self
 
-def getParameters(default):
+class ParameterRecord(object):
     """
-    Read parameters from the command line.
-    
+    Typed, slot-based parameter record.  Use parameterRecord to build
+    the record class of a given set of default values.
+
+    Each field is either a scalar (a single parameter set) or a numpy
+    array (a batch of parameter sets, evaluated at once by vectorized
+    routines like transitProperties).
+    """
+    __slots__=()
+    _defaults={}
+    _types={}
+    def __init__(self,**values):
+        for key in self.__slots__:
+            setattr(self,key,castValue(values.get(key,self._defaults[key]),
+                                       self._types[key]))
+    def __repr__(self):
+        return "%s(%s)"%(self.__class__.__name__,
+                         ",".join("%s=%r"%(key,getattr(self,key))
+                                  for key in self.__slots__))
+
+def parameterRecord(default):
+    """
+    Build the record class for a dictionary of default values.  The
+    type of each field is the type of its default value.
+    """
+    return type("Parameters",(ParameterRecord,),
+                dict(__slots__=tuple(sorted(default.keys())),
+                     _defaults=dict(default),
+                     _types=dict((key,type(value)) 
+                                 for key,value in default.items())))
+
+def castValue(value,kind):
+    """
+    Convert a value (scalar, string or sequence) to the given type.
+    """
+    if isinstance(value,(np.ndarray,list,tuple)):
+        if kind is str:return np.asarray(value)
+        return np.asarray(value,dtype=kind)
+    if kind is str:return str(value)
+    return kind(value)
+
+class RangeSpec(object):
+    """
+    Range of values given as start:stop:step (stop included).
+    """
+    __slots__=("start","step","num")
+    def __init__(self,spec):
+        start,stop,step=[float(x) for x in spec.split(":")]
+        if step<=0 or stop<start:
+            raise ValueError("Bad range '%s'"%spec)
+        self.start=start
+        self.step=step
+        self.num=int(np.floor((stop-start)/step+1E-9))+1
+    def values(self,index):
+        return self.start+index*self.step
+
+def readTextLines(filename,names=None):
+    """
+    Read the data lines of a whitespace-separated table.
+
+    Column names are taken from the last commented line preceding the
+    first data line (the header) or, if there is none, from names.
+
+    Yield the column names and the data line.
+    """
+    header=None;data=False
+    for line in open(filename):
+        line=line.strip()
+        if line=="":continue
+        if line[0]=="#":
+            if not data:header=line.strip("#").split()
+            continue
+        data=True
+        if header is None:
+            if names is None:
+                raise ValueError("No column names for table '%s'"%filename)
+            header=names
+        yield header,line
+
+def readTextRows(filename,names=None):
+    """
+    Read a whitespace-separated table one row at a time (see
+    readTextLines).
+    """
+    for header,line in readTextLines(filename,names):
+        yield dict(zip(header,line.split()))
+
+def readBatches(filename,batch,names=None):
+    """
+    Read the columns of a table in batches of at most batch rows.
+
+    filename: JSON lines (.json, .jsonl), CSV with a header line
+              (.csv), NumPy structured array (.npy, memory-mapped) or
+              whitespace-separated text (any other extension, see
+              readTextLines)
+    names: column names of text tables without a header line
+
+    Yield a dictionary of numpy arrays (.npy) or lists per batch.
+    Values missing in some rows (sparse JSON lines, short text or CSV
+    rows) are None.
+    """
+    if filename.endswith(".npy"):
+        data=np.load(filename,mmap_mode="r")
+        for i in xrange(0,len(data),batch):
+            block=data[i:i+batch]
+            yield dict((key,np.array(block[key]))
+                       for key in data.dtype.names)
+        return
+
+    if filename.endswith(".csv"):
+        import csv
+        rows=csv.DictReader(open(filename))
+    elif filename.endswith(".json") or filename.endswith(".jsonl"):
+        import json
+        rows=(json.loads(line) for line in open(filename) 
+              if line.strip()!="")
+    else:
+        rows=readTextRows(filename,names)
+
+    def columns(block):
+        keys=set()
+        for row in block:keys.update(row.keys())
+        return dict((key,[row.get(key) for row in block]) for key in keys)
+
+    block=[]
+    for row in rows:
+        block.append(row)
+        if len(block)==batch:
+            yield columns(block)
+            block=[]
+    if len(block)>0:
+        yield columns(block)
+
+class ParameterSets(object):
+    """
+    Parameter sets built from default values, command-line overrides,
+    parameter files and range specifications.
+
+    Sets are the product of the file rows (or the default values when
+    no file is given) and the grid spanned by the ranges.  They are
+    never materialized: iterating yields ParameterRecord batches of at
+    most batch sets, computed on demand.
+    """
+    def __init__(self,default,overrides={},ranges=[],files=[],
+                 batch=10000):
+        self.Record=parameterRecord(default)
+        self.overrides=overrides
+        self.ranges=ranges
+        self.files=files
+        self.batch=batch
+        self.shape=tuple(spec.num for key,spec in ranges)
+        self.ngrid=int(np.prod(self.shape))
+
+    def nrows(self):
+        """
+        Number of file rows (None if unknown before reading them).
+        """
+        if len(self.files)==0:return 1
+        n=0
+        for filename in self.files:
+            if not filename.endswith(".npy"):return None
+            n+=len(np.load(filename,mmap_mode="r"))
+        return n
+
+    @property
+    def size(self):
+        """
+        Total number of parameter sets (None if unknown).
+        """
+        n=self.nrows()
+        return None if n is None else n*self.ngrid
+
+    def record(self,values):
+        """
+        Build a record from the file and grid values of a batch.
+        Missing file values (None or empty) take the default value.
+        """
+        defaults=self.Record._defaults
+        for key,value in values.items():
+            if key not in defaults or value.dtype.kind not in "OSU":
+                continue
+            missing=np.array([v is None or v=="" for v in value])
+            if missing.any():
+                values[key]=np.where(missing,defaults[key],value)
+        values.update(self.overrides)
+        return self.Record(**values)
+
+    def rows(self):
+        if len(self.files)==0:
+            yield dict()
+            return
+        for filename in self.files:
+            for cols in readBatches(filename,self.batch):
+                yield cols
+
+    def __iter__(self):
+        for cols in self.rows():
+            cols=dict((key,np.asarray(value)) for key,value in cols.items())
+            nrows=max([len(value) for value in cols.values()]+[1])
+            #Split the product of rows and grid in batches
+            nsets=nrows*self.ngrid
+            for i in xrange(0,nsets,self.batch):
+                row,cell=divmod(np.arange(i,min(i+self.batch,nsets)),
+                                self.ngrid)
+                values=dict((key,value[row]) for key,value in cols.items())
+                if len(self.ranges)>0:
+                    index=np.unravel_index(cell,self.shape)
+                    values.update((key,spec.values(index[k]))
+                                  for k,(key,spec) in enumerate(self.ranges))
+                yield self.record(values)
+
+def getParameterSets(default,batch=10000):
+    """
+    Read parameter sets from the command line.
+
     default: dictionary with the default values
-    
+
+    Arguments have the form <par>=<value> (several may be joined with
+    ';').  Numerical parameters also accept ranges
+    <par>=<start>:<stop>:<step>.  Two reserved arguments are:
+
+        sets=<file>[,<file>...]: parameter files (see readBatches)
+        batch=<n>: maximum number of sets per batch
+
+    Return a ParameterSets object.
     """
-    ip=dict()
+    types=dict((key,type(value)) for key,value in default.items())
+    overrides=dict()
+    ranges=[]
+    files=[]
 
     #GET PARAMETERS FROM COMMAND LINE
-    for i in xrange(1,len(argv)):
-        try:exec argv[i] in ip
-        except IndexError:pass
-        except NameError:
-            print "Bad formed input parameter '%s'."%argv[i]
-            exit(1)
-
-    if len(ip.keys())==0: 
+    for arg in argv[1:]:
+        for token in arg.split(";"):
+            if token.strip()=="":continue
+            try:
+                key,value=[x.strip() for x in token.split("=",1)]
+                value=value.strip("\"'")
+                if key=="sets":files+=value.split(",")
+                elif key=="batch":batch=int(value)
+                elif key not in types:
+                    print "Unknown parameter '%s' ignored."%key
+                elif types[key] is not str and ":" in value:
+                    ranges+=[(key,RangeSpec(value))]
+                else:
+                    overrides[key]=castValue(value,types[key])
+            except ValueError:
+                print "Bad formed input parameter '%s'."%token
+                exit(1)
+
+    if len(overrides)+len(ranges)+len(files)==0:
         print "No parameters overrided."
-        return dict2obj(default)
-
-    #CREATE PARAMETER OBJECTS
-    p=dict()
-    pkeys=ip.keys()
-    provkeys=""
-    for key in default.keys():
-        if key in pkeys:
-            p[key]=ip[key]
-            provkeys+="%s,"%key
-        else:p[key]=default[key]
-    print "Overrided parameters: %s."%provkeys.strip(",")
-
-    return dict2obj(p)
+    else:
+        if len(overrides)+len(ranges)>0:
+            print "Overrided parameters: %s."%",".join(
+                sorted(overrides.keys())+[key for key,spec in ranges])
+        if len(files)>0:
+            print "Parameter files: %s."%",".join(files)
+
+    return ParameterSets(default,overrides,ranges,files,batch)
+
+def getParameters(default):
+    """
+    Read a single parameter set from the command line.
+    
+    default: dictionary with the default values
+
+    See getParameterSets for the syntax.
+    """
+    sets=getParameterSets(default)
+    if sets.size!=1:
+        print "Only one parameter set is allowed by this script."
+        exit(1)
+    return iter(sets).next()
+
+############################################################
+# PHYSICAL ROUTINES
+############################################################
+def effectiveRingRadius(f,cosir,sinir):
+    """
+    Squared effective radius of a ring of radius f (in units of
+    the planetary radius) as seen through the stellar disk.
+
+    f: ring radius (Rplanet)
+    cosir,sinir: cosine and sine of the projected inclination
+
+    All arguments may be numpy arrays.
+    """
+    with np.errstate(invalid='ignore',divide='ignore'):
+        y=np.sqrt(f**2-1)/(f*sinir)
+        r2=np.where(f*cosir>1,
+                    f**2*cosir-1,
+                    f**2*cosir*2/np.pi*np.arcsin(y)-\
+                        2/np.pi*np.arcsin(y*f*cosir))
+    return r2
+
+def transitProperties(par):
+    """
+    Compute the basic transit properties of a ringed planet.
+
+    par: object with attributes rhotrue (g/cm^3), P (days), b, p,
+         fi, fe, tau, theta (degrees) and ir (degrees).  Attributes
+         may be scalars or numpy arrays of the same shape, in which
+         case every parameter set is evaluated at once.
+
+    Return an object with the orbital (a, cosiorb, siniorb), ring (A,
+    B, beta, ri2, re2, ARp), transit (delta, pobs, contact positions,
+    T14p, T23p, T14, T23) and derived (aobs, bobs, rhoobs, PR, logPR)
+    properties.  hp and bmax give the transit condition: there is no
+    (or a grazing) transit when b > bmax.
+    """
+    #==============================
+    #ORBITAL PROPERTIES
+    #==============================
+    a=(GCONST*(par.rhotrue*1E3)/(3*np.pi)*(par.P*DAY)**2)**(1./3)
+    cosiorb=par.b/a
+    siniorb=(1-cosiorb**2)**0.5
+
+    #==============================
+    #EXTERNAL RING PROPERTIES
+    #==============================
+    A=par.fe*par.p
+    B=A*np.cos(par.ir*DEG)
+
+    #==============================
+    #TRANSIT CONDITION
+    #==============================
+    hp=np.maximum(par.p,np.maximum(A*np.sin(par.theta*DEG),
+                                   B*np.cos(par.theta*DEG)))
+    bmax=1.0-hp
+
+    #==============================
+    #TRANSIT DEPTH
+    #==============================
+    cosir=np.cos(par.ir*DEG)
+    sinir=np.sin(par.ir*DEG)
+    beta=1-np.exp(-par.tau/cosir)
+    ri2=beta*effectiveRingRadius(par.fi,cosir,sinir)
+    re2=beta*effectiveRingRadius(par.fe,cosir,sinir)
+    ARp=np.pi*par.p**2+np.pi*(re2-ri2)*par.p**2
+    delta=ARp/np.pi
+    pobs=np.sqrt(delta)
+
+    #==============================
+    #CONTACT POSITIONS
+    #==============================
+    with np.errstate(invalid='ignore'):
+        xp14=np.sqrt((1+par.p)**2-par.b**2)
+        xp1=-xp14;xp4=+xp14
+        xp23=np.sqrt((1-par.p)**2-par.b**2)
+        xp2=-xp23;xp3=+xp23
+
+        xR13=1-A**2*(np.sin(par.theta*DEG)-par.b/A)**2*(1-B**2/A)
+        xR24=1-A**2*(np.sin(par.theta*DEG)+par.b/A)**2*(1-B**2/A)
+        xR1=-np.sqrt(xR13)-A*np.cos(par.theta*DEG)
+        xR2=-np.sqrt(xR24)+A*np.cos(par.theta*DEG)
+        xR3=+np.sqrt(xR13)-A*np.cos(par.theta*DEG)
+        xR4=+np.sqrt(xR24)+A*np.cos(par.theta*DEG)
+
+    x1=np.minimum(xp1,xR1)
+    x2=np.maximum(xp2,xR2)
+    x3=np.minimum(xp3,xR3)
+    x4=np.maximum(xp4,xR4)
+
+    #==============================
+    #TRANSIT TIMES
+    #==============================
+    with np.errstate(invalid='ignore'):
+        T14p=(par.P*DAY)*np.arcsin((xp4-xp1)/(a*siniorb))/(2*np.pi)/HOUR
+        T23p=(par.P*DAY)*np.arcsin((xp3-xp2)/(a*siniorb))/(2*np.pi)/HOUR
+        T14=(par.P*DAY)*np.arcsin((x4-x1)/(a*siniorb))/(2*np.pi)/HOUR
+        T23=(par.P*DAY)*np.arcsin((x3-x2)/(a*siniorb))/(2*np.pi)/HOUR
+
+    #==============================
+    #DERIVED PROPERTIES
+    #==============================
+    with np.errstate(invalid='ignore',divide='ignore'):
+        aobs=2*(par.P*DAY/HOUR)/np.pi*delta**0.25/(T14**2-T23**2)**0.5
+        bobs=((T14**2*(1-np.sqrt(delta))-T23**2*(1+np.sqrt(delta)))/\
+                  (T14**2-T23**2))**0.5
+        rhoobs=(3*np.pi/GCONST)*aobs**3/(par.P*DAY)**2/1E3
+        PR=rhoobs/par.rhotrue
+        logPR=np.log10(PR)
+
+    return dict2obj(dict(a=a,cosiorb=cosiorb,siniorb=siniorb,
+                         A=A,B=B,hp=hp,bmax=bmax,beta=beta,
+                         ri2=ri2,re2=re2,ARp=ARp,delta=delta,pobs=pobs,
+                         xp1=xp1,xp2=xp2,xp3=xp3,xp4=xp4,
+                         xR1=xR1,xR2=xR2,xR3=xR3,xR4=xR4,
+                         x1=x1,x2=x2,x3=x3,x4=x4,
+                         T14p=T14p,T23p=T23p,T14=T14,T23=T23,
+                         aobs=aobs,bobs=bobs,rhoobs=rhoobs,
+                         PR=PR,logPR=logPR))
+
+############################################################
+# CLASSIFICATION ROUTINES
+############################################################
+#%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
+#CANDIDATE CATALOG COLUMNS
+#%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
+# P (days), rhotrue (g/cm^3), delta (ppm), T14, T23 (hours) and
+# their 1-sigma errors
+CATALOG_COLUMNS=["id","P","rhotrue","erhotrue","delta","edelta",
+                 "T14","eT14","T23","eT23"]
+
+#%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
+#FIT SETTINGS
+#%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
+NOBS=4 #delta, T14, T23, rhotrue
+BADFIT=1E3 #Residual assigned to non-transiting models
+#Ring geometries (fe, theta, ir) marginalized by the ringed model
+FEGRID=[2.0,2.5,3.0] #Rplanet
+THETAGRID=[10.0,40.0,70.0] #degrees
+IRGRID=[50.0,70.0,85.0] #degrees
+
+def readCatalog(filename):
+    """
+    Read a candidate catalog one row at a time.
+
+    filename: candidate table in any format accepted by readBatches.
+              Text tables without a header line have the columns
+              CATALOG_COLUMNS.
+
+    Yield a dictionary per candidate.
+    """
+    for cols in readBatches(filename,1000,names=CATALOG_COLUMNS):
+        for key in CATALOG_COLUMNS:
+            if key not in cols:
+                raise ValueError("Column '%s' not found in catalog '%s'"%(
+                        key,filename))
+        for j in xrange(len(cols["id"])):
+            row=dict((key,value[j]) for key,value in cols.items())
+            for key in row.keys():
+                if key=="id":row[key]=str(row[key]);continue
+                if row[key] is None:del row[key];continue
+                #Bad values are left to checkCandidate
+                try:row[key]=float(row[key])
+                except (TypeError,ValueError):row[key]=np.nan
+            yield row
+
+def ringlessModel(x,cand):
+    """
+    Observables (delta, T14, T23, rhotrue) of a ringless planet.
+
+    x: rho (g/cm^3), p, b
+    cand: candidate object (provides P)
+    """
+    rho,p,b=x
+    par=dict2obj(dict(rhotrue=rho,P=cand.P,b=b,p=p,
+                      fi=1.0,fe=1.0,tau=0.0,theta=0.0,ir=0.0))
+    tp=transitProperties(par)
+    return np.array([p**2,tp.T14p,tp.T23p,rho])
+
+def ringedModel(x,cand,fi,fe,tau,theta,ir):
+    """
+    Observables (delta, T14, T23, rhotrue) of a ringed planet.
+
+    x: rho (g/cm^3), p, b
+    cand: candidate object (provides P)
+    fi,fe,tau,theta,ir: fixed ring geometry and normal opacity
+    """
+    rho,p,b=x
+    par=dict2obj(dict(rhotrue=rho,P=cand.P,b=b,p=p,
+                      fi=fi,fe=fe,tau=tau,theta=theta,ir=ir))
+    tp=transitProperties(par)
+    obs=np.array([tp.delta,tp.T14,tp.T23,rho])
+    if b>tp.bmax:obs[:]=np.nan
+    return obs
+
+def fitResiduals(x,model,cand,*args):
+    """
+    Normalized residuals of a model against the candidate observables.
+    """
+    obs=np.array([cand.delta*1E-6,cand.T14,cand.T23,cand.rhotrue])
+    err=np.array([cand.edelta*1E-6,cand.eT14,cand.eT23,cand.erhotrue])
+    res=(model(x,cand,*args)-obs)/err
+    res[~np.isfinite(res)]=BADFIT
+    return res
+
+def fitModel(model,starts,bounds,cand,*args):
+    """
+    Least-squares fit of a model starting from several points.
+
+    Return the best-fit parameters and their chi^2.
+    """
+    xbest=None;chi2best=np.inf
+    for x0 in starts:
+        x0=np.clip(x0,bounds[0],bounds[1])
+        sol=opt.least_squares(fitResiduals,x0,bounds=bounds,
+                              x_scale='jac',args=(model,cand)+args)
+        chi2=2*sol.cost
+        if chi2<chi2best:xbest,chi2best=sol.x,chi2
+    return xbest,chi2best
+
+def checkCandidate(row):
+    """
+    Check that a candidate can be classified.
+
+    Return a description of the problem or None if the candidate is
+    valid.
+    """
+    for key in CATALOG_COLUMNS[1:]:
+        if key not in row:return "missing %s"%key
+        if not np.isfinite(row[key]):return "non-finite %s"%key
+    for key in CATALOG_COLUMNS[1:]:
+        if key!="T23" and row[key]<=0:return "non-positive %s"%key
+    if not 0<=row["T23"]<row["T14"]:return "T23 not in [0,T14)"
+    return None
+
+def classifyCandidate(row,fi=1.5,tau=1.0):
+    """
+    Compare the ringed and ringless hypotheses for a candidate.
+
+    row: dictionary with the candidate observables (see CATALOG_COLUMNS)
+    fi,tau: ring interior radius (Rplanet) and normal opacity assumed
+            by the ringed model
+
+    Both models are fitted to delta, T14, T23 and rhotrue with the
+    same 3 free parameters (rho, p, b), one less than the number of
+    observables.  The ring geometry (fe, theta, ir) is not fitted: the
+    ringed likelihood is averaged over the geometries of FEGRID,
+    THETAGRID and IRGRID (uniform prior).  Since both models have the
+    same number of free parameters, BIC and AIC differences reduce to
+    2 lnLR and are not reported.
+
+    Return a dictionary with the chi^2 of the ringless fit and its
+    goodness-of-fit probability pringless (chi^2 with NOBS-3 degrees
+    of freedom), the chi^2 of the best ringed geometry, the
+    log-likelihood ratio lnLR (ringed marginal versus ringless;
+    positive values favor the ringed model), and the best ringed
+    parameters.
+
+    Invalid candidates (see checkCandidate) and failed fits are
+    reported with NaN values and the problem in the status entry.
+    """
+    failed=dict(id=row.get("id"),chi2ringless=np.nan,pringless=np.nan,
+                chi2ringed=np.nan,lnLR=np.nan,rho=np.nan,p=np.nan,
+                b=np.nan,fe=np.nan,theta=np.nan,ir=np.nan)
+    status=checkCandidate(row)
+    if status is not None:return dict(failed,status=status)
+    try:return fitCandidate(row,fi,tau)
+    except (ValueError,ArithmeticError,np.linalg.LinAlgError) as error:
+        return dict(failed,status="fit failed: %s"%error)
+
+def fitCandidate(row,fi,tau):
+    """
+    Fit the ringless and ringed models to a valid candidate (see
+    classifyCandidate).
+    """
+    cand=dict2obj(row)
+
+    #==============================
+    #RINGLESS FIT
+    #==============================
+    #Initial guess from the standard transit inversion
+    p0=np.sqrt(cand.delta*1E-6)
+    q=(cand.T23/cand.T14)**2
+    b02=((1-p0)**2-q*(1+p0)**2)/(1-q)
+    b0=np.sqrt(np.clip(b02,0.0,0.81))
+    bounds=([1E-3,1E-4,0.0],[1E3,0.5,1.0])
+    x0,chi20=fitModel(ringlessModel,[[cand.rhotrue,p0,b0]],
+                      bounds,cand)
+
+    #==============================
+    #RINGED FITS
+    #==============================
+    chi2s=[];best=None
+    for fe in FEGRID:
+        if fe<=fi:continue
+        for theta in THETAGRID:
+            for ir in IRGRID:
+                geometry=(fi,fe,tau,theta,ir)
+                #Start with the planet radius giving the observed depth
+                tp=ringedModel(x0,cand,*geometry)
+                scale=np.sqrt(cand.delta*1E-6/tp[0])
+                start=[x0[0],x0[1]*(scale if np.isfinite(scale) else 1),
+                       x0[2]]
+                x1,chi21=fitModel(ringedModel,[start],bounds,cand,
+                                  *geometry)
+                chi2s+=[chi21]
+                if best is None or chi21<best[1]:
+                    best=(x1,chi21,fe,theta,ir)
+    if len(chi2s)==0:raise ValueError("no ring geometry with fe>fi")
+    x1,chi21,fe,theta,ir=best
+
+    #==============================
+    #MODEL COMPARISON
+    #==============================
+    #Ringed likelihood averaged over the ring geometries
+    lnL=-np.array(chi2s)/2
+    lnLringed=lnL.max()+np.log(np.mean(np.exp(lnL-lnL.max())))
+    lnLR=lnLringed+chi20/2
+    pringless=stats.chi2.sf(chi20,NOBS-len(x0))
+
+    return dict(id=row["id"],chi2ringless=chi20,pringless=pringless,
+                chi2ringed=chi21,lnLR=lnLR,
+                rho=x1[0],p=x1[1],b=x1[2],fe=fe,theta=theta,ir=ir,
+                status=None)
+
+############################################################
+# REDUCTION ROUTINES
+############################################################
+def readColumns(filename,columns,batch=100000,names=None):
+    """
+    Read numerical columns of a result table in batches.
+
+    filename: table in any format accepted by readBatches
+    columns: list of column names
+    names: column names of text tables without a header line
+
+    Yield a list of float arrays (one per column) per batch.
+    """
+    def check(header):
+        for key in columns:
+            if key not in header:
+                raise ValueError("Column '%s' not found in '%s'"%(key,
+                                                                 filename))
+
+    if filename.split(".")[-1] in ("npy","csv","json","jsonl"):
+        for cols in readBatches(filename,batch):
+            check(cols)
+            yield [np.asarray(cols[key],dtype=float) for key in columns]
+        return
+
+    #Whitespace-separated tables are parsed a whole batch at a time
+    def parse(header,lines):
+        data=np.array(" ".join(lines).split(),dtype=float)
+        data=data.reshape(len(lines),len(header))
+        return [data[:,header.index(key)] for key in columns]
+
+    lines=[]
+    for header,line in readTextLines(filename,names):
+        if len(lines)==0:check(header)
+        lines.append(line)
+        if len(lines)==batch:
+            yield parse(header,lines)
+            lines=[]
+    if len(lines)>0:
+        yield parse(header,lines)
+
+def columnRange(filename,columns):
+    """
+    Minimum and maximum finite values of the given columns.
+
+    Constant columns get a range of width 1 centered on their value,
+    so they can be binned.
+    """
+    ranges=[[np.inf,-np.inf] for key in columns]
+    for values in readColumns(filename,columns):
+        for r,v in zip(ranges,values):
+            v=v[np.isfinite(v)]
+            if len(v)==0:continue
+            r[0]=min(r[0],v.min());r[1]=max(r[1],v.max())
+    for key,r in zip(columns,ranges):
+        if r[0]>r[1]:
+            raise ValueError("No finite values of column '%s' in '%s'"%(
+                    key,filename))
+        if r[0]==r[1]:r[0]-=0.5;r[1]+=0.5
+    return ranges
+
+def rangeTable(filename,columns=["logPR"]):
+    """
+    Range of columns of a result table (see columnRange) as a
+    reduction.
+
+    Return a dictionary with the limits of every column.
+    """
+    return dict(limits=np.array(columnRange(filename,columns)))
+
+def histogramTable(filename,column="logPR",bins=50,limits=None):
+    """
+    Histogram of a column of a result table.
+
+    limits: histogram limits (the column range if None)
+
+    Return a dictionary with the bin edges and counts.
+    """
+    if limits is None:limits=columnRange(filename,[column])[0]
+    counts=np.zeros(bins)
+    for values, in readColumns(filename,[column]):
+        counts+=np.histogram(values,bins=bins,range=limits)[0]
+    if counts.sum()==0:
+        raise ValueError("No values of column '%s' in '%s' within %s"%(
+                column,filename,list(limits)))
+    edges=np.linspace(limits[0],limits[1],bins+1)
+    return dict(edges=edges,counts=counts)
+
+def mapTable(filename,x="theta",y="ir",column="logPR",bins=[90,90],
+             limits=None):
+    """
+    Mean of a column of a result table binned in x and y.
+
+    limits: [[xmin,xmax],[ymin,ymax]] (the column ranges if None)
+
+    Return a dictionary with the bin edges, sums and counts (the
+    binned mean is sums/counts).
+    """
+    if limits is None:limits=columnRange(filename,[x,y])
+    sums=np.zeros(bins)
+    counts=np.zeros(bins)
+    for xs,ys,values in readColumns(filename,[x,y,column]):
+        good=np.isfinite(values)
+        sums+=np.histogram2d(xs[good],ys[good],bins=bins,range=limits,
+                             weights=values[good])[0]
+        counts+=np.histogram2d(xs[good],ys[good],bins=bins,
+                               range=limits)[0]
+    if counts.sum()==0:
+        raise ValueError("No finite values of column '%s' in '%s' "
+                         "within %s"%(column,filename,list(limits)))
+    xedges=np.linspace(limits[0][0],limits[0][1],bins[0]+1)
+    yedges=np.linspace(limits[1][0],limits[1][1],bins[1]+1)
+    return dict(xedges=xedges,yedges=yedges,sums=sums,counts=counts)
+
+#%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
+#CACHE
+#%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
+def fileHash(filename,cache):
+    """
+    SHA1 hash of the content of a file.
+
+    Hashes are remembered in <cache>/hashes.json together with the
+    file size and modification time, so unchanged files are not read
+    again.
+    """
+    import os,json,hashlib
+    index=os.path.join(cache,"hashes.json")
+    hashes=json.load(open(index)) if os.path.isfile(index) else dict()
+    stat=os.stat(filename)
+    path=os.path.abspath(filename)
+    if path in hashes and hashes[path][:2]==[stat.st_size,stat.st_mtime]:
+        return hashes[path][2]
+
+    sha=hashlib.sha1()
+    fl=open(filename,"rb")
+    for block in iter(lambda:fl.read(1<<20),b""):sha.update(block)
+    fl.close()
+    hashes[path]=[stat.st_size,stat.st_mtime,sha.hexdigest()]
+    json.dump(hashes,open(index,"w"))
+    return sha.hexdigest()
+
+def cachedReduction(reduction,filename,cache="cache",**options):
+    """
+    Apply a reduction routine (e.g. histogramTable, mapTable) to a
+    result file, reusing the cached result when neither the file
+    content nor the options changed.
+
+    Return the reduction dictionary and its cache key.
+    """
+    import os,json,hashlib
+    if not os.path.isdir(cache):os.makedirs(cache)
+    key=hashlib.sha1(json.dumps([reduction.__name__,
+                                 fileHash(filename,cache),options],
+                                sort_keys=True)).hexdigest()
+    path=os.path.join(cache,key+".npz")
+    if os.path.isfile(path):
+        data=np.load(path)
+        return dict((name,data[name]) for name in data.files),key
+    result=reduction(filename,**options)
+    np.savez(path,**result)
+    return result,key
 
 ############################################################
 # TESTS